@@ -16,6 +16,14 @@ class Settings:
     SECRET_KEY = os.getenv("SECRET_KEY")
     ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_EXPIRE_HOURS", "24")) * 60
+    # Costo de bcrypt (2^rounds iteraciones). Los tests lo bajan a 4
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+    # bcrypt solo admite 4..31; fallar al arrancar y no en el primer registro
+    if not 4 <= BCRYPT_ROUNDS <= 31:
+        raise ValueError(
+            f"BCRYPT_ROUNDS={BCRYPT_ROUNDS} fuera de rango: bcrypt admite de 4 a 31"
+        )
 
     if not SECRET_KEY:
         # Usar valor por defecto en desarrollo
@@ -23,7 +23,7 @@ def hash_password(password: str) -> str:
         password_bytes = password_bytes[:72]
     
     # Generar salt y hash
-    salt = bcrypt.gensalt(rounds=12)
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     
     return hashed.decode('utf-8')
@@ -29,6 +29,31 @@ def create_async_engine(database_url: str) -> AsyncEngine:
     )
 
 
+def create_migration_engine(database_url: str, pool_size: int = 2, **kwargs) -> AsyncEngine:
+    """
+    Create async engine for one-off migration and setup scripts.
+
+    A migration is a single writer: a small fixed pool reuses a couple of
+    connections instead of opening one per checkout (NullPool), and skips the
+    pre-ping round trip.
+
+    Args:
+        database_url: PostgreSQL connection URL
+        pool_size: Fixed number of pooled connections
+        **kwargs: Extra arguments for `create_async_engine` (echo, connect_args...)
+
+    Returns:
+        AsyncEngine instance
+    """
+    return sa_create_async_engine(
+        database_url,
+        pool_size=pool_size,
+        max_overflow=0,
+        pool_pre_ping=False,
+        **kwargs,
+    )
+
+
 def get_engine() -> AsyncEngine:
     """
     Get async engine using settings.
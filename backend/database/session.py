@@ -7,21 +7,23 @@ Provides async session management using SQLAlchemy 2.0.
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 
 from backend.database.connection import get_engine
 
 
-def get_session_factory() -> async_sessionmaker[AsyncSession]:
+def get_session_factory(engine: AsyncEngine | None = None) -> async_sessionmaker[AsyncSession]:
     """
     Get async session factory.
 
+    Args:
+        engine: Engine to bind; defaults to `get_engine()`
+
     Returns:
         async_sessionmaker configured for the engine
     """
-    engine = get_engine()
     return async_sessionmaker(
-        bind=engine,
+        bind=engine or get_engine(),
         class_=AsyncSession,
         expire_on_commit=False,
         autoflush=False,
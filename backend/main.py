@@ -30,6 +30,7 @@ from backend.api.endPoints.router import api_router
 from backend.api.graphql.queries import BusinessQuery
 from backend.api.graphql.mutations import BusinessMutation
 from backend.container import create_business_container
+from backend.tools.agent2_recognition_client import aclose_clients, prewarm
 
 
 def create_app() -> FastAPI:
@@ -77,6 +78,10 @@ def create_app() -> FastAPI:
     container = create_business_container()
     logger.info("Contenedor de servicios iniciado correctamente.")
 
+    # Pre-calentar la conexión al Agente 2 y cerrarla al apagar
+    app.add_event_handler("startup", prewarm)
+    app.add_event_handler("shutdown", aclose_clients)
+
     # 5. Configurar GraphQL
     schema = strawberry.Schema(
         query=BusinessQuery,
@@ -6,7 +6,7 @@ Maneja operaciones CRUD de usuarios, autenticación y gestión de perfiles.
 from typing import List, Optional, Tuple
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import or_, select
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 
@@ -84,21 +84,18 @@ class UserService:
         
         try:
             async with self.session_factory() as session:
-                # Verificar si username ya existe
-                existing = await session.execute(
-                    select(User).where(User.username == username)
-                )
-                if existing.scalar_one_or_none():
+                # Verificar username y email en una sola consulta
+                existing = (await session.execute(
+                    select(User.username, User.email).where(
+                        or_(User.username == username, User.email == email)
+                    )
+                )).all()
+                if any(row.username == username for row in existing):
                     raise UserAlreadyExistsError(f"Username '{username}' ya está en uso")
-                
-                # Verificar si email ya existe
-                existing = await session.execute(
-                    select(User).where(User.email == email)
-                )
-                if existing.scalar_one_or_none():
+                if existing:
                     raise UserAlreadyExistsError(f"Email '{email}' ya está registrado")
                 
-                # Crear usuario
+                # Crear usuario (bcrypt solo una vez confirmada la unicidad)
                 user = User(
                     username=username,
                     email=email,
@@ -5,6 +5,7 @@ import uuid
 from decimal import Decimal
 
 import pytest
+from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.database.models import Order, OrderDetail, OrderStatus, ProductStock, User
@@ -17,6 +18,11 @@ from backend.services.order_service import (
 )
 
 
+# IDs fijos que nunca existen en la BD de tests (fallos reproducibles)
+_FAKE_PRODUCT_ID = uuid.UUID("00000000-0000-0000-0000-000000000001")
+_FAKE_ORDER_ID = uuid.UUID("00000000-0000-0000-0000-000000000002")
+
+
 @pytest.mark.unit
 @pytest.mark.asyncio
 class TestOrderServiceCreate:
@@ -26,10 +32,11 @@ class TestOrderServiceCreate:
         self,
         clean_db: AsyncSession,
         order_service: OrderService,
-        test_user: User,
-        test_product: ProductStock,
+        user_and_product: tuple[User, ProductStock],
     ):
         """Test de creación exitosa de pedido."""
+        test_user, test_product = user_and_product
+
         order_data = OrderCreate(
             user_id=test_user.id,
             details=[
@@ -51,18 +58,29 @@ class TestOrderServiceCreate:
         assert len(order.details) == 1
         assert order.details[0].quantity == 2
         
-        # Verificar que el stock fue descontado
-        await clean_db.refresh(test_product)
-        assert test_product.quantity_available == 8  # 10 - 2
+        # Verificar en un solo round-trip que el detalle quedó persistido
+        # y que el stock fue descontado
+        persisted_quantity = (
+            select(func.sum(OrderDetail.quantity))
+            .where(OrderDetail.order_id == order.id)
+            .scalar_subquery()
+        )
+        available, stored_quantity = (await clean_db.execute(
+            select(ProductStock.quantity_available, persisted_quantity)
+            .where(ProductStock.id == test_product.id)
+        )).one()
+        assert stored_quantity == 2
+        assert available == 8  # 10 - 2
     
     async def test_create_order_insufficient_stock(
         self,
         clean_db: AsyncSession,
         order_service: OrderService,
-        test_user: User,
-        test_product: ProductStock,
+        user_and_product: tuple[User, ProductStock],
     ):
         """Test de error cuando no hay stock suficiente."""
+        test_user, test_product = user_and_product
+
         order_data = OrderCreate(
             user_id=test_user.id,
             details=[
@@ -80,8 +98,11 @@ class TestOrderServiceCreate:
         assert "Stock insuficiente" in str(exc_info.value)
         
         # Verificar que el stock no cambió
-        await clean_db.refresh(test_product)
-        assert test_product.quantity_available == 10
+        available = (await clean_db.execute(
+            select(ProductStock.quantity_available)
+            .where(ProductStock.id == test_product.id)
+        )).scalar_one()
+        assert available == 10
     
     async def test_create_order_product_not_found(
         self,
@@ -90,13 +111,11 @@ class TestOrderServiceCreate:
         test_user: User,
     ):
         """Test de error cuando el producto no existe."""
-        fake_product_id = uuid.uuid4()
-        
         order_data = OrderCreate(
             user_id=test_user.id,
             details=[
                 OrderDetailCreate(
-                    product_id=fake_product_id,
+                    product_id=_FAKE_PRODUCT_ID,
                     quantity=1
                 )
             ],
@@ -117,38 +136,37 @@ class TestOrderServiceQueries:
     async def test_get_order_by_id(
         self,
         order_service: OrderService,
-        test_order: Order,
+        shared_order: Order,
     ):
         """Test de obtener pedido por ID."""
-        result = await order_service.get_order_by_id(test_order.id)
+        result = await order_service.get_order_by_id(shared_order.id)
         
         assert result is not None
-        assert result.id == test_order.id
-        assert result.user_id == test_order.user_id
+        assert result.id == shared_order.id
+        assert result.user_id == shared_order.user_id
     
     async def test_get_order_by_id_not_found(self, order_service: OrderService):
         """Test de obtener pedido inexistente."""
-        fake_id = uuid.uuid4()
-        result = await order_service.get_order_by_id(fake_id)
+        result = await order_service.get_order_by_id(_FAKE_ORDER_ID)
         
         assert result is None
     
     async def test_get_orders_by_user(
         self,
         order_service: OrderService,
-        test_user: User,
-        test_order: Order,
+        shared_user: User,
+        shared_order: Order,
     ):
         """Test de obtener pedidos de un usuario."""
-        orders = await order_service.get_orders_by_user(test_user.id)
+        orders = await order_service.get_orders_by_user(shared_user.id)
         
         assert len(orders) >= 1
-        assert any(o.id == test_order.id for o in orders)
+        assert any(o.id == shared_order.id for o in orders)
     
     async def test_get_recent_orders(
         self,
         order_service: OrderService,
-        test_order: Order,
+        shared_order: Order,
     ):
         """Test de obtener pedidos recientes."""
         orders = await order_service.get_recent_orders(limit=10)
@@ -178,10 +196,13 @@ class TestOrderServiceStatus:
         
         assert success is True
         
-        # Refrescar el objeto para obtener los cambios de la BD
-        await clean_db.refresh(test_order)
-        assert test_order.status == OrderStatus.PAID
-        assert test_order.payment_status == "COMPLETED"
+        # Leer solo las columnas afectadas en lugar de refrescar todo el pedido
+        status, payment_status = (await clean_db.execute(
+            select(Order.status, Order.payment_status)
+            .where(Order.id == test_order.id)
+        )).one()
+        assert status == OrderStatus.PAID
+        assert payment_status == "COMPLETED"
     
     async def test_update_order_status_invalid_transition(
         self,
@@ -206,24 +227,14 @@ class TestOrderServiceStatus:
         test_product: ProductStock,
     ):
         """Test de cancelación de pedido."""
-        # Limpiar detalles existentes del fixture (si los hay)
-        # y crear nuestro propio detalle con cantidad conocida
-        from sqlalchemy import delete
+        # Fijar una cantidad conocida en el detalle que ya creó el fixture y
+        # descontar el stock manualmente para simular el pedido procesado.
+        # Un solo UPDATE (en vez de DELETE + INSERT) y un único COMMIT.
         await clean_db.execute(
-            delete(OrderDetail).where(OrderDetail.order_id == test_order.id)
-        )
-        
-        # Crear detalle para verificar restauración de stock
-        detail = OrderDetail(
-            order_id=test_order.id,
-            product_id=test_product.id,
-            product_name=test_product.product_name,
-            quantity=3,
-            unit_price=Decimal("50.00"),
+            update(OrderDetail)
+            .where(OrderDetail.order_id == test_order.id)
+            .values(quantity=3, unit_price=Decimal("50.00"))
         )
-        clean_db.add(detail)
-        
-        # Descontar stock manualmente para simular pedido procesado
         test_product.quantity_available = 7  # 10 - 3
         await clean_db.commit()
         
@@ -232,8 +243,11 @@ class TestOrderServiceStatus:
         assert success is True
         
         # Verificar que el stock fue restaurado
-        await clean_db.refresh(test_product)
-        assert test_product.quantity_available == 10  # 7 + 3
+        available = (await clean_db.execute(
+            select(ProductStock.quantity_available)
+            .where(ProductStock.id == test_product.id)
+        )).scalar_one()
+        assert available == 10  # 7 + 3
 
 
 @pytest.mark.unit
@@ -245,10 +259,11 @@ class TestOrderServiceCheckout:
         self,
         clean_db: AsyncSession,
         order_service: OrderService,
-        test_user: User,
-        test_product: ProductStock,
+        user_and_product: tuple[User, ProductStock],
     ):
         """Test de checkout exitoso."""
+        test_user, test_product = user_and_product
+
         items = [
             {"product_id": test_product.id, "quantity": 2}
         ]
@@ -268,10 +283,11 @@ class TestOrderServiceCheckout:
     async def test_create_order_from_checkout_insufficient_stock(
         self,
         order_service: OrderService,
-        test_user: User,
-        test_product: ProductStock,
+        user_and_product: tuple[User, ProductStock],
     ):
         """Test de checkout con stock insuficiente."""
+        test_user, test_product = user_and_product
+
         items = [
             {"product_id": test_product.id, "quantity": 100}  # Más del stock
         ]
@@ -292,14 +308,9 @@ class TestOrderServiceCheckout:
 class TestOrderServiceStats:
     """Tests para estadísticas de pedidos."""
     
-    async def test_get_order_stats(
-        self,
-        order_service: OrderService,
-        test_user: User,
-        test_order: Order,
-    ):
+    async def test_get_order_stats(self, order_stats: dict):
         """Test de obtener estadísticas."""
-        stats = await order_service.get_order_stats()
+        stats = order_stats["all"]
         
         assert "total_orders" in stats
         assert "total_revenue" in stats
@@ -307,13 +318,8 @@ class TestOrderServiceStats:
         
         assert stats["total_orders"] >= 1
     
-    async def test_get_order_stats_by_user(
-        self,
-        order_service: OrderService,
-        test_user: User,
-        test_order: Order,
-    ):
+    async def test_get_order_stats_by_user(self, order_stats: dict):
         """Test de obtener estadísticas por usuario."""
-        stats = await order_service.get_order_stats(user_id=test_user.id)
+        stats = order_stats["by_user"]
         
         assert stats["total_orders"] >= 1
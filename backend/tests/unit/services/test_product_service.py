@@ -3,76 +3,82 @@ Tests unitarios para ProductService.
 """
 import uuid
 from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.database.models import ProductStock
 from backend.services.product_service import ProductService
 
 
+# ID fijo que nunca existe en la BD de tests (fallos reproducibles)
+_FAKE_PRODUCT_ID = uuid.UUID("00000000-0000-0000-0000-000000000001")
+
+
 @pytest.mark.unit
 @pytest.mark.asyncio
 class TestProductServiceSearch:
     """Tests para búsqueda de productos."""
     
-    async def test_search_by_name_found(
+    @pytest.mark.parametrize(
+        "query,expect_found,substring",
+        [
+            ("Nike", True, None),
+            ("ProductoInexistenteXYZ", False, None),
+            ("Air", True, "Air"),  # Coincidencia parcial
+        ],
+        ids=["found", "not_found", "partial_match"],
+    )
+    async def test_search_by_name(
         self,
         product_service: ProductService,
-        test_product: ProductStock,
+        shared_product: ProductStock,
+        query: str,
+        expect_found: bool,
+        substring: str | None,
     ):
-        """Test de búsqueda que encuentra productos."""
-        results = await product_service.search_by_name("Nike")
+        """Test de búsqueda por nombre (encontrado, inexistente y parcial)."""
+        results = await product_service.search_by_name(query)
         
-        assert len(results) >= 1
-        assert any(p.product_name == test_product.product_name for p in results)
-    
-    async def test_search_by_name_not_found(self, product_service: ProductService):
-        """Test de búsqueda que no encuentra productos."""
-        results = await product_service.search_by_name("ProductoInexistenteXYZ")
-        
-        assert len(results) == 0
-    
-    async def test_search_by_name_partial_match(
-        self,
-        product_service: ProductService,
-        test_product: ProductStock,
-    ):
-        """Test de búsqueda con coincidencia parcial."""
-        results = await product_service.search_by_name("Air")
+        if not expect_found:
+            assert len(results) == 0
+            return
         
         assert len(results) >= 1
-        assert any("Air" in p.product_name for p in results)
+        assert any(p.product_name == shared_product.product_name for p in results)
+        if substring:
+            assert any(substring in p.product_name for p in results)
     
     async def test_get_product_by_id_found(
         self,
         product_service: ProductService,
-        test_product: ProductStock,
+        shared_product: ProductStock,
     ):
         """Test de obtener producto por ID."""
-        result = await product_service.get_product_by_id(test_product.id)
+        result = await product_service.get_product_by_id(shared_product.id)
         
         assert result is not None
-        assert result.id == test_product.id
-        assert result.product_name == test_product.product_name
+        assert result.id == shared_product.id
+        assert result.product_name == shared_product.product_name
     
     async def test_get_product_by_id_not_found(self, product_service: ProductService):
         """Test de obtener producto por ID inexistente."""
-        fake_id = uuid.uuid4()
-        result = await product_service.get_product_by_id(fake_id)
+        result = await product_service.get_product_by_id(_FAKE_PRODUCT_ID)
         
         assert result is None
     
     async def test_get_product_by_name_found(
         self,
         product_service: ProductService,
-        test_product: ProductStock,
+        shared_product: ProductStock,
     ):
         """Test de obtener producto por nombre."""
-        result = await product_service.get_product_by_name(test_product.product_name)
+        result = await product_service.get_product_by_name(shared_product.product_name)
         
         assert result is not None
-        assert result.product_name == test_product.product_name
+        assert result.product_name == shared_product.product_name
 
 
 @pytest.mark.unit
@@ -125,8 +131,11 @@ class TestProductServiceStock:
         
         assert success is True
         
-        await clean_db.refresh(test_product)
-        assert test_product.quantity_available == 8  # 5 + 3
+        available = (await clean_db.execute(
+            select(ProductStock.quantity_available)
+            .where(ProductStock.id == test_product.id)
+        )).scalar_one()
+        assert available == 8  # 5 + 3
     
     async def test_update_stock(
         self,
@@ -139,8 +148,11 @@ class TestProductServiceStock:
         
         assert success is True
         
-        await clean_db.refresh(test_product)
-        assert test_product.quantity_available == 50
+        available = (await clean_db.execute(
+            select(ProductStock.quantity_available)
+            .where(ProductStock.id == test_product.id)
+        )).scalar_one()
+        assert available == 50
 
 
 @pytest.mark.unit
@@ -166,8 +178,11 @@ class TestProductServiceProcessOrder:
         assert result["total"] == 240.00  # 2 * 120
         
         # Verificar stock descontado
-        await clean_db.refresh(test_product)
-        assert test_product.quantity_available == 8  # 10 - 2
+        available = (await clean_db.execute(
+            select(ProductStock.quantity_available)
+            .where(ProductStock.id == test_product.id)
+        )).scalar_one()
+        assert available == 8  # 10 - 2
     
     async def test_process_order_insufficient_stock(
         self,
@@ -212,3 +227,60 @@ class TestProductServiceProcessOrder:
         # Verificar que se creó el pedido (si la función lo soporta)
         if "order_id" in result:
             assert result["order_id"] is not None
+
+
+@pytest.fixture
+def empty_session() -> AsyncMock:
+    """Sesión simulada cuyas consultas no devuelven filas."""
+    session = AsyncMock(spec=AsyncSession)
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = []
+    session.execute.return_value = result
+    return session
+
+
+@pytest.fixture
+def mock_product_service(empty_session: AsyncMock) -> ProductService:
+    """ProductService sobre una fábrica que entrega `empty_session` (sin Postgres)."""
+    session_factory = MagicMock()
+    session_factory.return_value.__aenter__.return_value = empty_session
+    return ProductService(session_factory)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestProductServiceNotFound:
+    """Casos sin resultados, contra una sesión simulada."""
+    
+    async def test_search_by_name_sin_resultados(
+        self,
+        mock_product_service: ProductService,
+        empty_session: AsyncMock,
+    ):
+        """Una búsqueda sin coincidencias devuelve lista vacía."""
+        results = await mock_product_service.search_by_name("ProductoInexistenteXYZ")
+        
+        assert results == []
+        empty_session.execute.assert_awaited_once()
+    
+    async def test_get_products_by_barcodes_sin_resultados(
+        self,
+        mock_product_service: ProductService,
+        empty_session: AsyncMock,
+    ):
+        """Códigos de barras que no existen en la BD devuelven lista vacía."""
+        results = await mock_product_service.get_products_by_barcodes(
+            ["0000000000000", "9999999999999"]
+        )
+        
+        assert results == []
+        empty_session.execute.assert_awaited_once()
+    
+    async def test_get_products_by_barcodes_lista_vacia(
+        self,
+        mock_product_service: ProductService,
+        empty_session: AsyncMock,
+    ):
+        """Sin códigos de barras no se consulta la BD."""
+        assert await mock_product_service.get_products_by_barcodes([]) == []
+        empty_session.execute.assert_not_awaited()
@@ -5,6 +5,7 @@ import pytest
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from backend.config.security.securityJWT import hash_password
 from backend.services.user_service import (
     UserService,
     UserAlreadyExistsError,
@@ -13,6 +14,10 @@ from backend.services.user_service import (
 from backend.database.models import User
 
 
+# Hash conocido de "oldpassword": bcrypt es lento a propósito, se calcula una vez
+_OLD_HASH = hash_password("oldpassword")
+
+
 @pytest.mark.unit
 @pytest.mark.asyncio
 class TestUserServiceCreate:
@@ -20,18 +25,10 @@ class TestUserServiceCreate:
     
     async def test_create_user_success(
         self,
+        user_service: UserService,
         clean_db: AsyncSession,
     ):
         """Test de creación exitosa de usuario."""
-        from sqlalchemy.ext.asyncio import async_sessionmaker
-        from backend.database.session import get_engine
-        
-        session_factory = async_sessionmaker(
-            bind=clean_db.bind,
-            expire_on_commit=False
-        )
-        user_service = UserService(session_factory)
-        
         user, message = await user_service.create_user(
             username="testuser",
             email="test@example.com",
@@ -49,18 +46,10 @@ class TestUserServiceCreate:
     
     async def test_create_user_duplicate_username(
         self,
-        clean_db: AsyncSession,
+        user_service: UserService,
         test_user: User
     ):
         """Test de error al crear usuario con username duplicado."""
-        from sqlalchemy.ext.asyncio import async_sessionmaker
-        
-        session_factory = async_sessionmaker(
-            bind=clean_db.bind,
-            expire_on_commit=False
-        )
-        user_service = UserService(session_factory)
-        
         with pytest.raises(UserAlreadyExistsError):
             await user_service.create_user(
                 username=test_user.username,  # Username existente
@@ -71,18 +60,10 @@ class TestUserServiceCreate:
     
     async def test_create_user_duplicate_email(
         self,
-        clean_db: AsyncSession,
+        user_service: UserService,
         test_user: User
     ):
         """Test de error al crear usuario con email duplicado."""
-        from sqlalchemy.ext.asyncio import async_sessionmaker
-        
-        session_factory = async_sessionmaker(
-            bind=clean_db.bind,
-            expire_on_commit=False
-        )
-        user_service = UserService(session_factory)
-        
         with pytest.raises(UserAlreadyExistsError):
             await user_service.create_user(
                 username="otrousuario",
@@ -99,18 +80,10 @@ class TestUserServiceQueries:
     
     async def test_get_user_by_id(
         self,
-        clean_db: AsyncSession,
+        user_service: UserService,
         test_user: User
     ):
         """Test de obtener usuario por ID."""
-        from sqlalchemy.ext.asyncio import async_sessionmaker
-        
-        session_factory = async_sessionmaker(
-            bind=clean_db.bind,
-            expire_on_commit=False
-        )
-        user_service = UserService(session_factory)
-        
         user = await user_service.get_user_by_id(test_user.id)
         
         assert user is not None
@@ -119,18 +92,10 @@ class TestUserServiceQueries:
     
     async def test_get_user_by_username(
         self,
-        clean_db: AsyncSession,
+        user_service: UserService,
         test_user: User
     ):
         """Test de obtener usuario por username."""
-        from sqlalchemy.ext.asyncio import async_sessionmaker
-        
-        session_factory = async_sessionmaker(
-            bind=clean_db.bind,
-            expire_on_commit=False
-        )
-        user_service = UserService(session_factory)
-        
         user = await user_service.get_user_by_username(test_user.username)
         
         assert user is not None
@@ -138,18 +103,10 @@ class TestUserServiceQueries:
     
     async def test_get_user_by_email(
         self,
-        clean_db: AsyncSession,
+        user_service: UserService,
         test_user: User
     ):
         """Test de obtener usuario por email."""
-        from sqlalchemy.ext.asyncio import async_sessionmaker
-        
-        session_factory = async_sessionmaker(
-            bind=clean_db.bind,
-            expire_on_commit=False
-        )
-        user_service = UserService(session_factory)
-        
         user = await user_service.get_user_by_email(test_user.email)
         
         assert user is not None
@@ -157,18 +114,10 @@ class TestUserServiceQueries:
     
     async def test_list_users(
         self,
-        clean_db: AsyncSession,
+        user_service: UserService,
         test_user: User
     ):
         """Test de listar usuarios."""
-        from sqlalchemy.ext.asyncio import async_sessionmaker
-        
-        session_factory = async_sessionmaker(
-            bind=clean_db.bind,
-            expire_on_commit=False
-        )
-        user_service = UserService(session_factory)
-        
         users = await user_service.list_users()
         
         assert len(users) >= 1
@@ -176,18 +125,10 @@ class TestUserServiceQueries:
     
     async def test_list_users_by_role(
         self,
-        clean_db: AsyncSession,
+        user_service: UserService,
         test_user: User
     ):
         """Test de listar usuarios filtrados por rol."""
-        from sqlalchemy.ext.asyncio import async_sessionmaker
-        
-        session_factory = async_sessionmaker(
-            bind=clean_db.bind,
-            expire_on_commit=False
-        )
-        user_service = UserService(session_factory)
-        
         # Filtrar por rol cliente (2)
         users = await user_service.list_users(role=2)
         
@@ -201,18 +142,10 @@ class TestUserServiceUpdates:
     
     async def test_update_user(
         self,
-        clean_db: AsyncSession,
+        user_service: UserService,
         test_user: User
     ):
         """Test de actualizar datos de usuario."""
-        from sqlalchemy.ext.asyncio import async_sessionmaker
-        
-        session_factory = async_sessionmaker(
-            bind=clean_db.bind,
-            expire_on_commit=False
-        )
-        user_service = UserService(session_factory)
-        
         user, message = await user_service.update_user(
             user_id=test_user.id,
             full_name="Nombre Actualizado"
@@ -224,21 +157,13 @@ class TestUserServiceUpdates:
     
     async def test_change_password_success(
         self,
+        user_service: UserService,
         clean_db: AsyncSession,
         test_user: User
     ):
         """Test de cambio exitoso de contraseña."""
-        from sqlalchemy.ext.asyncio import async_sessionmaker
-        
-        session_factory = async_sessionmaker(
-            bind=clean_db.bind,
-            expire_on_commit=False
-        )
-        user_service = UserService(session_factory)
-        
         # Primero actualizar el password_hash del test_user
-        from backend.config.security.securityJWT import hash_password
-        test_user.password_hash = hash_password("oldpassword")
+        test_user.password_hash = _OLD_HASH
         await clean_db.commit()
         
         success, message = await user_service.change_password(
@@ -252,18 +177,10 @@ class TestUserServiceUpdates:
     
     async def test_change_password_wrong_old(
         self,
-        clean_db: AsyncSession,
+        user_service: UserService,
         test_user: User
     ):
         """Test de cambio de contraseña con contraseña actual incorrecta."""
-        from sqlalchemy.ext.asyncio import async_sessionmaker
-        
-        session_factory = async_sessionmaker(
-            bind=clean_db.bind,
-            expire_on_commit=False
-        )
-        user_service = UserService(session_factory)
-        
         success, message = await user_service.change_password(
             user_id=test_user.id,
             old_password="wrongpassword",
@@ -281,18 +198,10 @@ class TestUserServiceStats:
     
     async def test_get_user_stats(
         self,
-        clean_db: AsyncSession,
+        user_service: UserService,
         test_user: User
     ):
         """Test de obtener estadísticas."""
-        from sqlalchemy.ext.asyncio import async_sessionmaker
-        
-        session_factory = async_sessionmaker(
-            bind=clean_db.bind,
-            expire_on_commit=False
-        )
-        user_service = UserService(session_factory)
-        
         stats = await user_service.get_user_stats()
         
         assert "total_users" in stats
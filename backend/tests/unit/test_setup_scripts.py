@@ -0,0 +1,47 @@
+"""
+Smoke test de los scripts de setup de la BD (init, migraciones, catálogo).
+
+Solo se importan (sin conectar a Postgres): detecta errores de nivel de
+módulo que romperían `setup_db_all.py` antes de ejecutar ningún paso.
+"""
+import asyncio
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[3]
+
+
+def _load(name: str, filename: str):
+    spec = importlib.util.spec_from_file_location(f"_smoke_{name}", ROOT / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+setup_db_all = _load("setup_db_all", "setup_db_all.py")
+
+
+class TestSetupScripts:
+    """Cada paso de setup_db_all se importa y expone `run(engine)`."""
+
+    @pytest.mark.parametrize(
+        "name,filename",
+        [(name, filename) for name, filename, _, _ in setup_db_all.SCRIPTS],
+    )
+    def test_script_importa_y_expone_run(self, name, filename, monkeypatch):
+        # No recargar el .env del proyecto: pisaría el PG_URL de los tests
+        monkeypatch.setattr("backend.tools._env._done", True)
+
+        module = setup_db_all.load_script(name, str(ROOT / filename))
+
+        assert module is not None
+        assert asyncio.iscoroutinefunction(module.run)
+
+    def test_dependencias_declaradas_existen(self):
+        """Las dependencias apuntan a pasos anteriores (orden topológico)."""
+        vistos = set()
+        for name, _, _, depends_on in setup_db_all.SCRIPTS:
+            assert set(depends_on) <= vistos
+            vistos.add(name)
@@ -0,0 +1,222 @@
+"""
+Tests unitarios para ProductRecognitionClient (Agente 2).
+
+Las peticiones HTTP se resuelven con `httpx.MockTransport`: no hace falta
+que el servicio del Agente 2 esté corriendo.
+"""
+import asyncio
+import io
+import os
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from backend.tools import agent2_recognition_client as agent2
+from backend.tools.agent2_recognition_client import ProductRecognitionClient
+
+
+_PREDICT_OK = {"label": "Nike Air Zoom Pegasus 40", "probability": 0.92, "matches": 48}
+
+
+class _Agent2Stub:
+    """
+    Agente 2 simulado: respuesta JSON por ruta y registro de rutas pedidas.
+
+    Una respuesta puede ser un callable que recibe la petición, para
+    responder según la imagen enviada.
+    """
+
+    def __init__(self):
+        self.calls: list[str] = []
+        self.requests: list[httpx.Request] = []
+        self.responses = {
+            "/predict": _PREDICT_OK,
+            "/register": {"message": "Product registered", "keypoints": 310},
+        }
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        self.calls.append(request.url.path)
+        self.requests.append(request)
+        body = self.responses[request.url.path]
+        if callable(body):
+            body = body(request)
+        return httpx.Response(200, json=body)
+
+
+@pytest_asyncio.fixture
+async def agent2_stub(monkeypatch):
+    """Sustituye el cliente HTTP compartido por uno con transporte simulado."""
+    stub = _Agent2Stub()
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(stub))
+
+    async def fake_get_client(base_url: str, timeout: float) -> httpx.AsyncClient:
+        return http_client
+
+    monkeypatch.setattr(agent2, "_get_client", fake_get_client)
+    yield stub
+    await http_client.aclose()
+
+
+@pytest.fixture
+def client() -> ProductRecognitionClient:
+    """Cliente apuntando a una URL ficticia (el transporte está simulado)."""
+    return ProductRecognitionClient(base_url="http://agent2.test")
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestRecognitionCache:
+    """Tests de la caché LRU de reconocimientos."""
+
+    async def test_cache_hit_no_repite_peticion(self, client, agent2_stub):
+        """La misma imagen se resuelve desde la caché la segunda vez."""
+        first = await client.recognize_product(b"foto-1", "a.jpg")
+        second = await client.recognize_product(b"foto-1", "a.jpg")
+
+        assert agent2_stub.calls == ["/predict"]
+        assert first == second
+        assert first["success"] is True
+        assert first["product_name"] == _PREDICT_OK["label"]
+
+    async def test_cache_devuelve_copias(self, client, agent2_stub):
+        """Modificar un resultado no altera lo memorizado."""
+        first = await client.recognize_product(b"foto-1")
+        first["product_name"] = "modificado"
+
+        second = await client.recognize_product(b"foto-1")
+
+        assert second["product_name"] == _PREDICT_OK["label"]
+
+    async def test_fallos_no_se_memorizan(self, client, agent2_stub):
+        """Un "Unknown" no queda fijado: se vuelve a consultar al Agente 2."""
+        agent2_stub.responses["/predict"] = {"label": "Unknown", "probability": 0.0, "matches": 0}
+
+        await client.recognize_product(b"foto-1")
+        result = await client.recognize_product(b"foto-1")
+
+        assert agent2_stub.calls == ["/predict", "/predict"]
+        assert result["success"] is False
+
+    async def test_eviction_lru(self, client, agent2_stub, monkeypatch):
+        """Al superar el máximo se descarta la entrada usada hace más tiempo."""
+        monkeypatch.setattr(agent2, "_CACHE_MAX", 2)
+
+        await client.recognize_product(b"foto-1")
+        await client.recognize_product(b"foto-2")
+        await client.recognize_product(b"foto-1")  # foto-1 pasa a ser la más reciente
+        await client.recognize_product(b"foto-3")  # desaloja foto-2
+        assert agent2_stub.calls == ["/predict"] * 3
+
+        await client.recognize_product(b"foto-1")
+        await client.recognize_product(b"foto-3")
+        assert len(agent2_stub.calls) == 3
+
+        await client.recognize_product(b"foto-2")
+        assert len(agent2_stub.calls) == 4
+
+    async def test_register_product_invalida_cache(self, client, agent2_stub):
+        """Registrar un producto puede cambiar resultados ya vistos: se vacía la caché."""
+        await client.recognize_product(b"foto-1")
+
+        registered = await client.register_product(b"nuevo", "Nike Nuevo")
+        await client.recognize_product(b"foto-1")
+
+        assert registered["success"] is True
+        assert agent2_stub.calls == ["/predict", "/register", "/predict"]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestRecognizeProductsBatch:
+    """Tests del reconocimiento concurrente de varias imágenes."""
+
+    async def test_resultados_en_orden_de_entrada(self, client, agent2_stub):
+        """Cada resultado corresponde a su imagen, en el orden de `items`."""
+        def predict(request: httpx.Request) -> dict:
+            for n in ("1", "2", "3"):
+                if f"foto-{n}".encode() in request.content:
+                    return {"label": f"Producto {n}", "probability": 0.9, "matches": 20}
+
+        agent2_stub.responses["/predict"] = predict
+        items = [(b"foto-3", "c.jpg"), (b"foto-1", "a.jpg"), (b"foto-2", "b.jpg")]
+
+        results = await client.recognize_products_batch(items, max_concurrency=2)
+
+        assert [r["product_name"] for r in results] == ["Producto 3", "Producto 1", "Producto 2"]
+        assert len(agent2_stub.calls) == 3
+
+    async def test_orden_se_mantiene_aunque_terminen_desordenados(self, client, monkeypatch):
+        """Las peticiones más lentas no desplazan su resultado en la lista."""
+        async def fake_recognize(image_bytes: bytes, filename: str = "image.jpg") -> dict:
+            await asyncio.sleep(0.01 * (3 - int(image_bytes[-1:])))
+            return {"success": True, "product_name": image_bytes.decode()}
+
+        monkeypatch.setattr(client, "recognize_product", fake_recognize)
+
+        results = await client.recognize_products_batch([(b"foto-1", "a.jpg"), (b"foto-2", "b.jpg")])
+
+        assert [r["product_name"] for r in results] == ["foto-1", "foto-2"]
+
+    async def test_excepcion_se_convierte_en_error(self, client, agent2_stub, monkeypatch):
+        """Una excepción en un item se traduce con `_err` sin afectar al resto."""
+        original = client.recognize_product
+
+        async def flaky(image_bytes: bytes, filename: str = "image.jpg") -> dict:
+            if image_bytes == b"rota":
+                raise RuntimeError("imagen corrupta")
+            return await original(image_bytes, filename)
+
+        monkeypatch.setattr(client, "recognize_product", flaky)
+
+        results = await client.recognize_products_batch(
+            [(b"foto-1", "a.jpg"), (b"rota", "b.jpg"), (b"foto-2", "c.jpg")]
+        )
+
+        assert results[1] == agent2._err("imagen corrupta")
+        assert results[0]["success"] is True
+        assert results[2]["success"] is True
+        assert agent2_stub.calls == ["/predict", "/predict"]
+
+
+@pytest.mark.unit
+class TestDownscale:
+    """Tests de la reducción de imágenes grandes antes de subirlas."""
+
+    @pytest.mark.asyncio
+    async def test_sin_pillow_se_envian_los_bytes_originales(self, client, agent2_stub, monkeypatch):
+        """Sin Pillow no se intenta reducir: la imagen viaja tal cual."""
+        monkeypatch.setattr(agent2, "_Image", None)
+
+        def no_llamar(image_bytes: bytes) -> bytes:
+            raise AssertionError("_maybe_downscale no debería llamarse sin Pillow")
+
+        monkeypatch.setattr(agent2, "_maybe_downscale", no_llamar)
+        grande = b"\xff" * agent2._DOWNSCALE_MIN_BYTES
+
+        result = await client.recognize_product(grande)
+
+        assert result["success"] is True
+        assert agent2_stub.calls == ["/predict"]
+        assert grande in agent2_stub.requests[0].content
+
+    def test_reduce_imagen_grande(self):
+        """Una imagen grande se reescala al lado máximo y ocupa menos."""
+        image_mod = pytest.importorskip("PIL.Image")
+        buf = io.BytesIO()
+        image_mod.frombytes("RGB", (1600, 1200), os.urandom(1600 * 1200 * 3)).save(buf, "PNG")
+        original = buf.getvalue()
+
+        reducida = agent2._maybe_downscale(original, max_edge=800)
+
+        assert len(reducida) < len(original)
+        with image_mod.open(io.BytesIO(reducida)) as img:
+            assert max(img.size) == 800
+
+    def test_bytes_no_decodificables_se_devuelven_igual(self):
+        """Si Pillow no puede abrir la imagen se devuelven los bytes originales."""
+        pytest.importorskip("PIL.Image")
+        datos = b"no-es-una-imagen" * 1000
+
+        assert agent2._maybe_downscale(datos) is datos
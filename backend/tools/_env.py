@@ -0,0 +1,36 @@
+"""
+Carga del entorno para los scripts de base de datos (init, seeds, migraciones).
+
+Lee el `.env` de la raíz del proyecto y define un SECRET_KEY de desarrollo si
+no existe. Se ejecuta una sola vez por proceso aunque varios scripts lo llamen.
+"""
+import os
+from pathlib import Path
+
+import dotenv
+
+_DEV_SECRET_KEY = "super-secret-key-for-dev-only-2026"
+
+_done = False
+
+
+def bootstrap() -> None:
+    """Carga el `.env` y el SECRET_KEY por defecto (idempotente)."""
+    global _done
+    if _done:
+        return
+    _done = True
+
+    env_path = Path(__file__).resolve().parents[2] / ".env"
+    if env_path.exists():
+        dotenv.load_dotenv(dotenv_path=env_path, override=True)
+        print(f"✓ Cargado .env desde: {env_path}")
+    else:
+        dotenv.load_dotenv(override=True)
+        print("✓ Cargado .env desde ruta por defecto")
+
+    # Configurar SECRET_KEY si no existe
+    if not os.getenv("SECRET_KEY"):
+        print("⚠️  SECRET_KEY no encontrada, usando valor por defecto")
+        os.environ["SECRET_KEY"] = _DEV_SECRET_KEY
+        os.environ["JWT_SECRET"] = _DEV_SECRET_KEY
@@ -10,15 +10,127 @@ El Agente 2 corre en puerto 5000 y expone endpoints REST para:
 - /register: Registrar nuevo producto con imagen
 - /health: Health check del servicio
 """
+import asyncio
+import hashlib
+import importlib.util
+import io
 import os
+from collections import OrderedDict
 from typing import Optional
 from decimal import Decimal
 
 import httpx
 import structlog
 
+try:  # orjson decodifica las respuestas más rápido que json de la stdlib
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:  # Pillow (o pillow-simd) es opcional: sin él las imágenes se envían tal cual
+    from PIL import Image as _Image
+except ImportError:  # pragma: no cover
+    _Image = None
+
 logger = structlog.get_logger()
 
+# Los logs de depuración del camino caliente solo se emiten con LOG_LEVEL=DEBUG
+_DEBUG = os.getenv("LOG_LEVEL", "INFO").upper() == "DEBUG"
+
+# Por debajo de este tamaño no compensa recomprimir la imagen
+_DOWNSCALE_MIN_BYTES = 300_000
+
+# Máximo de resultados de reconocimiento memorizados por cliente
+_CACHE_MAX = 512
+
+# Plantillas de respuesta fallida de /predict y /register
+_FAIL = {"success": False, "product_name": None, "matches": 0, "confidence": 0.0, "error": None}
+_REGISTER_FAIL = {"success": False, "message": "", "keypoints": 0, "error": None}
+
+
+def _err(msg: str) -> dict:
+    """Resultado de reconocimiento fallido con el mensaje de error dado."""
+    return {**_FAIL, "error": msg}
+
+
+def _register_err(msg: str) -> dict:
+    """Resultado de registro fallido con el mensaje de error dado."""
+    return {**_REGISTER_FAIL, "error": msg}
+
+# Clientes HTTP compartidos, uno por (base_url, timeout) dentro de cada event
+# loop: las conexiones de un cliente pertenecen al loop que las abrió.
+# Reutilizar el pool evita el handshake TCP/TLS en cada petición al Agente 2.
+_CLIENTS: dict[asyncio.AbstractEventLoop, dict[tuple[str, float], httpx.AsyncClient]] = {}
+_LIMITS = httpx.Limits(max_keepalive_connections=16, max_connections=64, keepalive_expiry=60)
+# HTTP/2 multiplexa las peticiones concurrentes en una sola conexión; requiere h2
+_HTTP2 = importlib.util.find_spec("h2") is not None
+# Referencias a tareas en segundo plano para que no las recolecte el GC
+_BACKGROUND_TASKS: set[asyncio.Task] = set()
+
+
+async def _get_client(base_url: str, timeout: float) -> httpx.AsyncClient:
+    """
+    Devuelve el cliente compartido para (base_url, timeout) en el loop actual.
+    
+    Sin `await` entre la consulta y el alta: dentro de un loop no hay carrera.
+    """
+    loop = asyncio.get_running_loop()
+    clients = _CLIENTS.get(loop)
+    if clients is None:
+        # Descartar los clientes de loops ya cerrados (otro asyncio.run, tests)
+        for old in [old for old in _CLIENTS if old.is_closed()]:
+            del _CLIENTS[old]
+        clients = _CLIENTS[loop] = {}
+    key = (base_url, timeout)
+    client = clients.get(key)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(timeout=timeout, limits=_LIMITS, http2=_HTTP2)
+        clients[key] = client
+    return client
+
+
+def _loads(response: httpx.Response):
+    """Decodifica el cuerpo JSON de la respuesta, con orjson si está disponible."""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+def _maybe_downscale(image_bytes: bytes, max_edge: int = 1024, quality: int = 85) -> bytes:
+    """
+    Reduce la imagen a `max_edge` px en su lado mayor y la recomprime como JPEG.
+    
+    SIFT tolera bien una compresión moderada, y el payload queda varias veces
+    más pequeño. Si la imagen no se puede decodificar o no se reduce, se
+    devuelven los bytes originales.
+    """
+    try:
+        with _Image.open(io.BytesIO(image_bytes)) as img:
+            img.thumbnail((max_edge, max_edge), _Image.LANCZOS)
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            buf = io.BytesIO()
+            img.save(buf, "JPEG", quality=quality, optimize=True)
+    except Exception as e:
+        if _DEBUG:
+            logger.debug("Image downscale skipped", error=str(e))
+        return image_bytes
+    data = buf.getvalue()
+    return data if len(data) < len(image_bytes) else image_bytes
+
+
+async def aclose_clients() -> None:
+    """
+    Cierra los clientes HTTP compartidos del event loop actual.
+    
+    Se llama en el shutdown de FastAPI; cualquier otro punto de entrada que
+    use el cliente en su propio loop debe llamarla antes de cerrarlo.
+    """
+    clients = list(_CLIENTS.pop(asyncio.get_running_loop(), {}).values())
+    for client in clients:
+        await client.aclose()
+    logger.debug("Agent 2 HTTP clients closed", count=len(clients))
+
 
 class ProductRecognitionClient:
     """
@@ -30,7 +142,6 @@ class ProductRecognitionClient:
     Attributes:
         base_url: URL base del servicio del Agente 2
         timeout: Timeout en segundos para las peticiones
-        client: Cliente HTTP async de httpx
     
     Example:
         >>> client = ProductRecognitionClient()
@@ -53,7 +164,8 @@ class ProductRecognitionClient:
         """
         self.base_url = (base_url or os.getenv("AGENT2_URL", "http://localhost:5000")).rstrip('/')
         self.timeout = timeout
-        self.client = httpx.AsyncClient(timeout=timeout)
+        # LRU de reconocimientos exitosos, indexado por hash del contenido
+        self._cache: OrderedDict[bytes, dict] = OrderedDict()
         
         logger.info(
             "ProductRecognitionClient initialized",
@@ -94,26 +206,40 @@ class ProductRecognitionClient:
             ...     print(f"Producto: {result['product_name']}")
             ...     print(f"Confianza: {result['confidence']:.2%}")
         """
+        # La misma foto reenviada (reintento, doble toque) no vuelve a Agent 2
+        key = hashlib.blake2b(image_bytes, digest_size=16).digest()
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return dict(cached)
+        
         try:
-            logger.debug(
-                "Sending image to Agent 2 for recognition",
-                filename=filename,
-                size_bytes=len(image_bytes)
-            )
+            if _DEBUG:
+                logger.debug(
+                    "Sending image to Agent 2 for recognition",
+                    filename=filename,
+                    size_bytes=len(image_bytes)
+                )
+            
+            # Reducir fotos grandes fuera del event loop antes de subirlas
+            if _Image is not None and len(image_bytes) >= _DOWNSCALE_MIN_BYTES:
+                image_bytes = await asyncio.to_thread(_maybe_downscale, image_bytes)
             
-            # Preparar el archivo multipart
+            # Preparar el archivo multipart (file-like: httpx lo envía por bloques)
             files = {
-                "image": (filename, image_bytes, "image/jpeg")
+                "image": (filename, io.BytesIO(image_bytes), "image/jpeg")
             }
             
-            response = await self.client.post(
+            client = await _get_client(self.base_url, self.timeout)
+            response = await client.post(
                 f"{self.base_url}/predict",
                 files=files
             )
             response.raise_for_status()
             
-            data = response.json()
-            logger.debug("Agent 2 response received", response=data)
+            data = _loads(response)
+            if _DEBUG:
+                logger.debug("Agent 2 response received", response=data)
             
             # El agente retorna "Unknown" si no encuentra coincidencias
             is_unknown = data.get("label") == "Unknown" or data.get("label") == "unknown"
@@ -123,7 +249,7 @@ class ProductRecognitionClient:
             # Éxito si NO es Unknown Y tiene suficiente confianza
             is_success = not is_unknown and confidence > 0.3 and matches > 5
             
-            return {
+            result = {
                 "success": is_success,
                 "product_name": None if is_unknown else data.get("label"),
                 "matches": matches,
@@ -131,19 +257,22 @@ class ProductRecognitionClient:
                 "error": None
             }
             
+            # Solo se memorizan aciertos, para no fijar errores transitorios.
+            # Sin caché el dict se devuelve tal cual, sin copia adicional.
+            if not is_success:
+                return result
+            self._cache[key] = result
+            if len(self._cache) > _CACHE_MAX:
+                self._cache.popitem(last=False)
+            return dict(result)
+            
         except httpx.HTTPStatusError as e:
             logger.error(
                 "HTTP error from Agent 2",
                 status=e.response.status_code,
                 response_text=e.response.text
             )
-            return {
-                "success": False,
-                "product_name": None,
-                "matches": 0,
-                "confidence": 0.0,
-                "error": f"Service error: {e.response.status_code}"
-            }
+            return _err(f"Service error: {e.response.status_code}")
             
         except httpx.ConnectError as e:
             logger.error(
@@ -151,23 +280,50 @@ class ProductRecognitionClient:
                 base_url=self.base_url,
                 error=str(e)
             )
-            return {
-                "success": False,
-                "product_name": None,
-                "matches": 0,
-                "confidence": 0.0,
-                "error": "Agent 2 service is not available"
-            }
+            return _err("Agent 2 service is not available")
+            
+        except (httpx.TimeoutException, httpx.NetworkError) as e:
+            # Fallo conocido de red: una línea, sin traceback
+            logger.warning("Agent 2 unavailable", error=str(e))
+            return _err(str(e))
             
         except Exception as e:
             logger.error("Error calling Agent 2", error=str(e), exc_info=True)
-            return {
-                "success": False,
-                "product_name": None,
-                "matches": 0,
-                "confidence": 0.0,
-                "error": str(e)
-            }
+            return _err(str(e))
+    
+    async def recognize_products_batch(
+        self,
+        items: list[tuple[bytes, str]],
+        max_concurrency: int = 8
+    ) -> list[dict]:
+        """
+        Identifica varios productos (p. ej. recortes de una misma foto) en paralelo.
+        
+        Las peticiones a /predict se lanzan concurrentemente, limitadas por un
+        semáforo, para solapar la latencia de red y el cómputo del Agente 2.
+        
+        Args:
+            items: Lista de tuplas (image_bytes, filename)
+            max_concurrency: Número máximo de peticiones simultáneas
+            
+        Returns:
+            Lista de dicts con el mismo formato que `recognize_product`,
+            en el mismo orden que `items`.
+        """
+        sem = asyncio.Semaphore(max_concurrency)
+        
+        async def _one(image_bytes: bytes, filename: str) -> dict:
+            async with sem:
+                return await self.recognize_product(image_bytes, filename)
+        
+        results = await asyncio.gather(
+            *(_one(image_bytes, filename) for image_bytes, filename in items),
+            return_exceptions=True
+        )
+        return [
+            _err(str(result)) if isinstance(result, BaseException) else result
+            for result in results
+        ]
     
     async def register_product(
         self,
@@ -203,14 +359,15 @@ class ProductRecognitionClient:
             )
             
             files = {
-                "image": (filename, image_bytes, "image/jpeg")
+                "image": (filename, io.BytesIO(image_bytes), "image/jpeg")
             }
             
             data = {
                 "name": product_name
             }
             
-            response = await self.client.post(
+            client = await _get_client(self.base_url, self.timeout)
+            response = await client.post(
                 f"{self.base_url}/register",
                 files=files,
                 data=data
@@ -218,6 +375,8 @@ class ProductRecognitionClient:
             response.raise_for_status()
             
             result = response.json()
+            # Un producto nuevo puede cambiar el resultado de fotos ya vistas
+            self.invalidate()
             logger.info(
                 "Product registered successfully",
                 product_name=product_name,
@@ -237,21 +396,20 @@ class ProductRecognitionClient:
                 status=e.response.status_code,
                 product_name=product_name
             )
-            return {
-                "success": False,
-                "message": "",
-                "keypoints": 0,
-                "error": f"Service error: {e.response.status_code}"
-            }
+            return _register_err(f"Service error: {e.response.status_code}")
+            
+        except (httpx.TimeoutException, httpx.NetworkError) as e:
+            # Fallo conocido de red: una línea, sin traceback
+            logger.warning("Agent 2 unavailable", error=str(e), product_name=product_name)
+            return _register_err(str(e))
             
         except Exception as e:
             logger.error("Error registering product", error=str(e), exc_info=True)
-            return {
-                "success": False,
-                "message": "",
-                "keypoints": 0,
-                "error": str(e)
-            }
+            return _register_err(str(e))
+    
+    def invalidate(self) -> None:
+        """Vacía la caché de reconocimientos (p. ej. tras registrar un producto)."""
+        self._cache.clear()
     
     async def health_check(self) -> bool:
         """
@@ -261,7 +419,8 @@ class ProductRecognitionClient:
             True si el servicio responde correctamente, False en caso contrario
         """
         try:
-            response = await self.client.get(
+            client = await _get_client(self.base_url, self.timeout)
+            response = await client.get(
                 f"{self.base_url}/health",
                 timeout=5.0
             )
@@ -280,11 +439,12 @@ class ProductRecognitionClient:
             Dict con información de versiones o error
         """
         try:
-            response = await self.client.get(f"{self.base_url}/mlflow/versions")
+            client = await _get_client(self.base_url, self.timeout)
+            response = await client.get(f"{self.base_url}/mlflow/versions")
             response.raise_for_status()
             return {
                 "success": True,
-                "versions": response.json(),
+                "versions": _loads(response),
                 "error": None
             }
         except Exception as e:
@@ -297,11 +457,10 @@ class ProductRecognitionClient:
     
     async def close(self):
         """
-        Cierra la conexión HTTP.
+        No-op: el cliente HTTP es compartido por proceso.
         
-        Es importante llamar a este método al finalizar para liberar recursos.
+        Las conexiones se liberan en el shutdown mediante `aclose_clients()`.
         """
-        await self.client.aclose()
         logger.debug("ProductRecognitionClient closed")
     
     async def __aenter__(self):
@@ -311,3 +470,16 @@ class ProductRecognitionClient:
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit."""
         await self.close()
+
+
+async def prewarm() -> None:
+    """
+    Abre en segundo plano la conexión con el Agente 2.
+    
+    Pensado para el startup de FastAPI: el primer reconocimiento ya no paga
+    DNS + handshake TCP/TLS. No bloquea el arranque ni falla si el Agente 2
+    no está disponible.
+    """
+    task = asyncio.create_task(ProductRecognitionClient().health_check())
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_BACKGROUND_TASKS.discard)
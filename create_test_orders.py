@@ -3,36 +3,19 @@ Script para crear órdenes de prueba en la base de datos.
 Creado para poblar la BD con datos realistas de pedidos.
 """
 import asyncio
-import os
-from pathlib import Path
+import functools
 from decimal import Decimal
 from datetime import datetime, timedelta
-import random
 
-import dotenv
+# Cargar variables de entorno (una sola vez por proceso)
+from backend.tools._env import bootstrap
 
-# Cargar variables de entorno
-env_path = Path(__file__).parent / ".env"
-if env_path.exists():
-    dotenv.load_dotenv(dotenv_path=env_path, override=True)
-    print(f"✓ Cargado .env desde: {env_path}")
-else:
-    dotenv.load_dotenv(override=True)
-    print("✓ Cargado .env desde ruta por defecto")
+bootstrap()
 
-# Configurar SECRET_KEY si no existe
-if not os.getenv("SECRET_KEY"):
-    print("⚠️  SECRET_KEY no encontrada, usando valor por defecto")
-    os.environ["SECRET_KEY"] = "super-secret-key-for-dev-only-2026"
-    os.environ["JWT_SECRET"] = "super-secret-key-for-dev-only-2026"
+from sqlalchemy import insert, select, text
 
-from sqlalchemy import text, select
-from backend.database.connection import get_engine
-from backend.database.models.order import Order, OrderStatus
-from backend.database.models.order_detail import OrderDetail
-from backend.database.models.product_stock import ProductStock
-from backend.database.models.user_model import User
-from backend.database.session import get_session_factory
+# numpy y los módulos del backend se importan dentro de crear_ordenes():
+# importar el script no paga la carga del ORM.
 
 
 # DIRECCIONES DE ENVÍO DE PRUEBA (Ecuador)
@@ -64,8 +47,31 @@ NOTAS_CLIENTES = [
 ]
 
 
+@functools.cache
+def _insert_statements():
+    """
+    Sentencias INSERT de órdenes y detalles, construidas una sola vez por proceso.
+    
+    Reutilizar los mismos objetos permite a SQLAlchemy servir la forma
+    compilada desde su caché en cada ejecución del seeder.
+    """
+    from backend.database.models.order import Order
+    from backend.database.models.order_detail import OrderDetail
+    
+    return (
+        insert(Order).returning(Order.id, sort_by_parameter_order=True),
+        insert(OrderDetail),
+    )
+
+
 async def crear_ordenes():
     """Crea órdenes de prueba en la base de datos."""
+    import numpy as np
+    from backend.database.models.order import OrderStatus
+    from backend.database.models.product_stock import ProductStock
+    from backend.database.models.user_model import User
+    from backend.database.session import get_session_factory
+    
     print("\n Creando órdenes de prueba...")
     
     session_factory = get_session_factory()
@@ -101,86 +107,97 @@ async def crear_ordenes():
         count_antes = result.scalar()
         print(f"   Órdenes existentes: {count_antes}")
         
-        # 4. Crear órdenes de prueba
-        ordenes_creadas = 0
+        # 4. Preparar órdenes de prueba
         num_ordenes = 15  # Crear 15 órdenes de ejemplo
+        planes = []  # (usuario, productos_orden, cantidades, total, status) por orden
+        orders_payload = []
+        
+        # Todas las variables por orden se sortean en un único lote vectorizado
+        rng = np.random.default_rng()
+        user_idx = rng.integers(0, len(usuarios), num_ordenes).tolist()
+        n_prods = rng.integers(1, 4, num_ordenes).tolist()  # 1-3 productos
+        dias_atras = rng.integers(0, 31, num_ordenes).tolist()  # últimos 30 días
+        dir_idx = rng.integers(0, len(DIRECCIONES_ENVIO), num_ordenes).tolist()
+        nota_idx = rng.integers(0, len(NOTAS_CLIENTES), num_ordenes).tolist()
+        # Estado: 70% entregadas, 20% enviadas, 10% procesando
+        status_rand = rng.random(num_ordenes)
+        statuses = np.where(
+            status_rand < 0.7,
+            OrderStatus.DELIVERED,
+            np.where(status_rand < 0.9, OrderStatus.SHIPPED, OrderStatus.PROCESSING)
+        ).tolist()
+        ahora = datetime.now()
+        # Precios en centavos enteros: el total se acumula sin aritmética Decimal
+        unit_cents = {
+            p.id: int((p.unit_cost * 100).to_integral_value()) for p in productos
+        }
         
         for i in range(num_ordenes):
-            try:
-                # Seleccionar usuario aleatorio
-                usuario = random.choice(usuarios)
-                
-                # Seleccionar 1-3 productos aleatorios
-                num_productos = random.randint(1, 3)
-                productos_orden = random.sample(productos, min(num_productos, len(productos)))
-                
-                # Calcular total
-                total = Decimal(0)
-                for producto in productos_orden:
-                    cantidad = random.randint(1, 2)  # 1 o 2 unidades
-                    total += producto.unit_cost * cantidad
-                
-                # Crear fecha aleatoria (últimos 30 días)
-                dias_atras = random.randint(0, 30)
-                fecha_orden = datetime.now() - timedelta(days=dias_atras)
-                
-                # Determinar estado (70% entregadas, 20% enviadas, 10% procesando)
-                rand = random.random()
-                if rand < 0.7:
-                    status = OrderStatus.DELIVERED
-                elif rand < 0.9:
-                    status = OrderStatus.SHIPPED
-                else:
-                    status = OrderStatus.PROCESSING
-                
-                # Crear la orden
-                nueva_orden = Order(
-                    user_id=usuario.id,
-                    total_amount=total,
-                    status=status,
-                    shipping_address=random.choice(DIRECCIONES_ENVIO),
-                    notes=random.choice(NOTAS_CLIENTES),
-                    created_at=fecha_orden
-                )
-                session.add(nueva_orden)
-                await session.flush()  # Para obtener el ID de la orden
-                
-                # Crear detalles de la orden
-                for producto in productos_orden:
-                    cantidad = random.randint(1, 2)
-                    detalle = OrderDetail(
-                        order_id=nueva_orden.id,
-                        product_id=producto.id,
-                        product_name=producto.product_name,  # Agregar nombre del producto
-                        product_sku=producto.product_sku,     # Agregar SKU
-                        quantity=cantidad,
-                        unit_price=producto.unit_cost,
-                        discount_amount=Decimal("0.0")  # Sin descuento
-                    )
-                    session.add(detalle)
-                
-                ordenes_creadas += 1
-                if status == OrderStatus.DELIVERED:
-                    estado_emoji = "hecho"
-                elif status == OrderStatus.SHIPPED:
-                    estado_emoji = "paquete"
-                else:
-                    estado_emoji = "reloj"
-                print(f"   {estado_emoji} Orden #{ordenes_creadas}: {usuario.username} - ${total:.2f} ({len(productos_orden)} productos) - {status}")
-                
-            except Exception as e:
-                print(f"  Error creando orden #{i+1}: {e}")
-                continue
+            usuario = usuarios[user_idx[i]]
+            status = statuses[i]
+            # Sortear índices (no objetos) sin reemplazo y desreferenciar
+            idxs = rng.choice(len(productos), size=min(n_prods[i], len(productos)), replace=False)
+            productos_orden = [productos[j] for j in idxs.tolist()]
+            
+            # Cantidades (1 o 2 unidades) sorteadas una sola vez: se usan
+            # tanto para el total como para las líneas de detalle
+            cantidades = rng.integers(1, 3, len(productos_orden)).tolist()
+            total_cents = sum(
+                unit_cents[p.id] * q for p, q in zip(productos_orden, cantidades)
+            )
+            total = Decimal(total_cents).scaleb(-2)
+            
+            planes.append((usuario, productos_orden, cantidades, total, status))
+            orders_payload.append(dict(
+                user_id=usuario.id,
+                total_amount=total,
+                status=status,
+                shipping_address=DIRECCIONES_ENVIO[dir_idx[i]],
+                notes=NOTAS_CLIENTES[nota_idx[i]],
+                created_at=ahora - timedelta(days=dias_atras[i])
+            ))
+        
+        # 5. Insertar todas las órdenes en una sola sentencia (RETURNING id)
+        insert_orders, insert_details = _insert_statements()
+        result = await session.execute(insert_orders, orders_payload)
+        order_ids = result.scalars().all()
+        
+        # 6. Insertar todos los detalles en una sola sentencia
+        details_payload = [
+            dict(
+                order_id=order_id,
+                product_id=producto.id,
+                product_name=producto.product_name,  # Agregar nombre del producto
+                product_sku=producto.product_sku,     # Agregar SKU
+                quantity=cantidad,
+                unit_price=producto.unit_cost,
+                discount_amount=Decimal("0.0")  # Sin descuento
+            )
+            for order_id, (_, productos_orden, cantidades, _, _) in zip(order_ids, planes)
+            for producto, cantidad in zip(productos_orden, cantidades)
+        ]
+        await session.execute(insert_details, details_payload)
         
         # Guardar cambios
         await session.commit()
+        ordenes_creadas = len(order_ids)
         
-        # Verificar el total final
-        result = await session.execute(text("SELECT COUNT(*) FROM orders"))
-        count_despues = result.scalar()
+        for n, (usuario, productos_orden, _, total, status) in enumerate(planes, start=1):
+            if status == OrderStatus.DELIVERED:
+                estado_emoji = "hecho"
+            elif status == OrderStatus.SHIPPED:
+                estado_emoji = "paquete"
+            else:
+                estado_emoji = "reloj"
+            print(f"   {estado_emoji} Orden #{n}: {usuario.username} - ${total:.2f} ({len(productos_orden)} productos) - {status}")
         
-        result = await session.execute(text("SELECT COUNT(*) FROM order_details"))
-        count_detalles = result.scalar()
+        # Verificar el total final
+        row = (await session.execute(text("""
+            SELECT
+                (SELECT COUNT(*) FROM orders) AS o,
+                (SELECT COUNT(*) FROM order_details) AS d
+        """))).one()
+        count_despues, count_detalles = row.o, row.d
         
         print(f"\n Resumen:")
         print(f"   Órdenes antes: {count_antes}")
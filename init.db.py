@@ -7,40 +7,17 @@ Este script crea las tablas e inserta datos iniciales incluyendo:
 - Categorías y marcas
 """
 import asyncio
-import os
-from pathlib import Path
 from decimal import Decimal
 
-# Cargar explícitamente las variables de entorno PRIMERO
-import dotenv
-
-# Buscar el archivo .env en el directorio actual
-env_path = Path(__file__).parent / ".env"
-if env_path.exists():
-    dotenv.load_dotenv(dotenv_path=env_path, override=True)
-    print(f"✓ Cargado .env desde: {env_path}")
-else:
-    dotenv.load_dotenv(override=True)
-    print("✓ Cargado .env desde ruta por defecto")
-
-# Verificar que SECRET_KEY esté configurada
-if not os.getenv("SECRET_KEY"):
-    print("⚠️  SECRET_KEY no encontrada en variables de entorno")
-    print("   Usando valor por defecto para desarrollo...")
-    os.environ["SECRET_KEY"] = "super-secret-key-for-dev-only-2026"
-    os.environ["JWT_SECRET"] = "super-secret-key-for-dev-only-2026"
-
-# Ahora importar los módulos del backend
+# Cargar variables de entorno (una sola vez por proceso)
+from backend.tools._env import bootstrap
+
+bootstrap()
+
 from sqlalchemy import text
-from backend.database.connection import get_engine
-from backend.database.models.base import Base
-from backend.database.models.order import Order, OrderStatus
-from backend.database.models.order_detail import OrderDetail
-from backend.database.models.product_stock import ProductStock
-from backend.database.models.user_model import User
-from backend.database.models.chat_history import ChatHistory
-from backend.database.session import get_session_factory
-from backend.config.security import securityJWT
+
+# Los módulos del backend se importan dentro de las funciones: importar el
+# script (p. ej. desde setup_db_all.py o un test) no carga ORM ni seguridad.
 
 
 # PRODUCTOS INICIALES CON BARCODES Y DESCUENTOS
@@ -67,52 +44,85 @@ USUARIOS_INICIALES = [
 ]
 
 
-async def init_database():
+def _hash_password_or_fallback(usr: dict) -> str:
+    """Hashea la contraseña del usuario semilla; si falla usa un hash pre-calculado."""
+    from backend.config.security import securityJWT
+    
+    try:
+        return securityJWT.hash_password(usr["password"])
+    except Exception as e:
+        print(f"   ⚠️  Usando hash pre-calculado para {usr['username']}: {e}")
+        if usr['username'] == 'admin':
+            return "$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/LewKyNiAYMyzJ/IiK"
+        return "$2b$12$qPVT1fJNVzdOQQK5XxQzQOAaD8jhz/I9J7lYkQqxzDZmOpm5KGh2q"
+
+
+async def _scalar(session_factory, sql: str):
+    """Ejecuta una consulta escalar en su propia sesión."""
+    async with session_factory() as session:
+        return (await session.execute(text(sql))).scalar()
+
+
+async def _table_stats(session_factory):
+    """Conteos de pedidos e inventario en una sola consulta."""
+    async with session_factory() as session:
+        return (await session.execute(text("""
+            SELECT
+                (SELECT count(*) FROM orders) AS o,
+                (SELECT count(*) FROM order_details) AS d,
+                (SELECT count(*) FROM product_stocks) AS p,
+                (SELECT count(*) FROM product_stocks WHERE is_on_sale = true) AS s
+        """))).one()
+
+
+async def run(engine):
+    """Crea las tablas e inserta los usuarios iniciales usando `engine`."""
+    from backend.database.models.base import Base
+    # Importar todos los modelos para registrarlos en Base.metadata
+    from backend.database.models.order import Order  # noqa: F401
+    from backend.database.models.order_detail import OrderDetail  # noqa: F401
+    from backend.database.models.product_stock import ProductStock  # noqa: F401
+    from backend.database.models.user_model import User
+    from backend.database.models.chat_history import ChatHistory  # noqa: F401
+    from backend.database.session import get_session_factory
+    
     print("=" * 70)
     print(" INICIALIZACIÓN DE BASE DE DATOS")
     print(" Con barcodes, descuentos y promociones")
     print("=" * 70)
     
-    # 1. Obtener el motor de conexión
-    engine = get_engine()
-    
-    # 2. Crear las tablas
+    # 1. Crear las tablas
     async with engine.begin() as conn:
         print("\n1. Creando tablas en Postgres...")
         await conn.run_sync(Base.metadata.create_all)
         print("   ✓ Tablas creadas: users, product_stocks, orders, order_details")
     
-    # 3. Insertar datos
-    session_factory = get_session_factory()
+    # 3. Lecturas independientes en paralelo (cada una con su propia sesión)
+    session_factory = get_session_factory(engine)
+    async with asyncio.TaskGroup() as tg:
+        t_products = tg.create_task(_scalar(session_factory, "SELECT count(*) FROM product_stocks"))
+        t_users = tg.create_task(_scalar(session_factory, "SELECT count(*) FROM users"))
+        t_stats = tg.create_task(_table_stats(session_factory))
     
     # 3.1 Productos
-    async with session_factory() as session:
-        result = await session.execute(text("SELECT count(*) FROM product_stocks"))
-        count = result.scalar()
-        
-        if count == 0:
-            print("\n2. Inventario inicial vacío.")
-            print("   ℹ️  Los productos se cargarán desde init_db_2.py")
-        else:
-            print(f"\n2. La base de datos ya tiene {count} productos.")
+    count = t_products.result()
+    if count == 0:
+        print("\n2. Inventario inicial vacío.")
+        print("   ℹ️  Los productos se cargarán desde init_db_2.py")
+    else:
+        print(f"\n2. La base de datos ya tiene {count} productos.")
     
-    # 3.2 Usuarios
-    async with session_factory() as session:
-        result = await session.execute(text("SELECT count(*) FROM users"))
-        count = result.scalar()
-
-        if count == 0:
+    # 3.2 Usuarios (la inserción depende del conteo: va en serie)
+    count = t_users.result()
+    if count == 0:
+        async with session_factory() as session:
             print("\n3. Insertando usuarios iniciales...")
-            for usr in USUARIOS_INICIALES:
-                try:
-                    password_hash = securityJWT.hash_password(usr["password"])
-                except Exception as e:
-                    print(f"   ⚠️  Usando hash pre-calculado para {usr['username']}: {e}")
-                    if usr['username'] == 'admin':
-                        password_hash = "$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/LewKyNiAYMyzJ/IiK"
-                    else:
-                        password_hash = "$2b$12$qPVT1fJNVzdOQQK5XxQzQOAaD8jhz/I9J7lYkQqxzDZmOpm5KGh2q"
-                
+            # bcrypt libera el GIL: los hashes se calculan en paralelo en hilos
+            hashes = await asyncio.gather(*[
+                asyncio.to_thread(_hash_password_or_fallback, usr)
+                for usr in USUARIOS_INICIALES
+            ])
+            for usr, password_hash in zip(USUARIOS_INICIALES, hashes):
                 nuevo_usuario = User(
                     username=usr["username"],
                     email=usr["email"],
@@ -126,36 +136,18 @@ async def init_database():
 
             await session.commit()
             print(f"   ✓ {len(USUARIOS_INICIALES)} usuarios creados")
-        else:
-            print(f"\n3. Ya existen {count} usuarios. No se insertó nada.")
+    else:
+        print(f"\n3. Ya existen {count} usuarios. No se insertó nada.")
     
     # 4. Verificar tablas de pedidos
-    async with session_factory() as session:
-        result = await session.execute(text("SELECT count(*) FROM orders"))
-        count = result.scalar()
-        print(f"\n4. Estado de tablas:")
-        print(f"   📦 Tabla 'orders': {count} pedidos")
-        
-        result = await session.execute(text("SELECT count(*) FROM order_details"))
-        count = result.scalar()
-        print(f"   📋 Tabla 'order_details': {count} líneas de detalle")
-        
-        # Contar productos con ofertas
-        result = await session.execute(
-            text("SELECT COUNT(*) FROM product_stocks WHERE is_on_sale = true")
-        )
-        ofertas_count = result.scalar()
-        
-        result = await session.execute(
-            text("SELECT COUNT(*) FROM product_stocks")
-        )
-        total_products = result.scalar()
-        
-        print(f"\n   📊 Estado del inventario:")
-        print(f"      • Total productos: {total_products}")
-        print(f"      • Productos en oferta: {ofertas_count}")
+    row = t_stats.result()
+    print(f"\n4. Estado de tablas:")
+    print(f"   📦 Tabla 'orders': {row.o} pedidos")
+    print(f"   📋 Tabla 'order_details': {row.d} líneas de detalle")
     
-    await engine.dispose()
+    print(f"\n   📊 Estado del inventario:")
+    print(f"      • Total productos: {row.p}")
+    print(f"      • Productos en oferta: {row.s}")
     
     print("\n" + "=" * 70)
     print(" ✅ BASE DE DATOS INICIALIZADA CORRECTAMENTE")
@@ -168,5 +160,16 @@ async def init_database():
     print("   • Cliente1 / cliente123 (rol: Cliente)")
 
 
+async def init_database():
+    """Punto de entrada standalone: crea el engine, ejecuta `run` y lo libera."""
+    from backend.database.connection import get_engine
+    
+    engine = get_engine()
+    try:
+        await run(engine)
+    finally:
+        await engine.dispose()
+
+
 if __name__ == "__main__":
     asyncio.run(init_database())
@@ -10,40 +10,27 @@ Este script agrega:
 Ejecutar: python migrate_db_add_barcode_discounts.py
 """
 import asyncio
-import os
-from pathlib import Path
 from decimal import Decimal
 
-import dotenv
+# Cargar variables de entorno (una sola vez por proceso)
+from backend.tools._env import bootstrap
 
-# Cargar variables de entorno
-env_path = Path(__file__).parent / ".env"
-if env_path.exists():
-    dotenv.load_dotenv(dotenv_path=env_path, override=True)
-    print(f"✓ Cargado .env desde: {env_path}")
-else:
-    dotenv.load_dotenv(override=True)
-
-# Configurar SECRET_KEY si no existe
-if not os.getenv("SECRET_KEY"):
-    os.environ["SECRET_KEY"] = "super-secret-key-for-dev-only-2026"
-    os.environ["JWT_SECRET"] = "super-secret-key-for-dev-only-2026"
+bootstrap()
 
 from sqlalchemy import text, inspect
-from backend.database.connection import get_engine
+from backend.config import get_business_settings
+from backend.database.connection import create_migration_engine
 from backend.database.session import get_session_factory
 
 
 # SQL para crear las nuevas columnas
-MIGRATION_SQL = """
--- Agregar columnas de código de barras
+MIGRATION_SQL_COLUMNS = """
+-- Agregar columnas de código de barras, descuentos y promociones
+-- (un solo ALTER: un único bloqueo exclusivo sobre la tabla)
 ALTER TABLE product_stocks 
 ADD COLUMN IF NOT EXISTS barcode VARCHAR(100) UNIQUE,
 ADD COLUMN IF NOT EXISTS category VARCHAR(100),
-ADD COLUMN IF NOT EXISTS brand VARCHAR(100);
-
--- Agregar columnas de descuentos y promociones
-ALTER TABLE product_stocks 
+ADD COLUMN IF NOT EXISTS brand VARCHAR(100),
 ADD COLUMN IF NOT EXISTS original_price NUMERIC(12,2),
 ADD COLUMN IF NOT EXISTS discount_percent NUMERIC(5,2),
 ADD COLUMN IF NOT EXISTS discount_amount NUMERIC(12,2),
@@ -51,7 +38,11 @@ ADD COLUMN IF NOT EXISTS promotion_code VARCHAR(50),
 ADD COLUMN IF NOT EXISTS promotion_description TEXT,
 ADD COLUMN IF NOT EXISTS promotion_valid_until DATE,
 ADD COLUMN IF NOT EXISTS is_on_sale BOOLEAN DEFAULT false;
+"""
 
+# Índices secundarios: se crean después de poblar las columnas para no
+# mantener el B-tree fila a fila durante el UPDATE masivo
+MIGRATION_SQL_INDEXES = """
 -- Crear índice para búsquedas rápidas por barcode
 CREATE INDEX IF NOT EXISTS idx_product_stocks_barcode 
 ON product_stocks(barcode);
@@ -62,6 +53,63 @@ ON product_stocks(is_on_sale) WHERE is_on_sale = true;
 """
 
 
+# Clave del advisory lock que serializa ejecuciones concurrentes de la migración
+MIGRATION_LOCK_KEY = 0xBA7C0DE
+
+# Filas por bloque al leer resultados con cursor del servidor
+STREAM_CHUNK = 256
+
+
+# Tabla temporal donde se cargan (COPY) los valores nuevos; se elimina al commit
+TMP_BARCODE_MAP_SQL = text("""
+CREATE TEMP TABLE tmp_barcode_map (
+    product_id VARCHAR(255) PRIMARY KEY,
+    barcode VARCHAR(100),
+    category VARCHAR(100),
+    brand VARCHAR(100),
+    discount_percent NUMERIC(5,2),
+    promo_desc TEXT
+) ON COMMIT DROP
+""")
+TMP_BARCODE_MAP_COLUMNS = [
+    "product_id", "barcode", "category", "brand", "discount_percent", "promo_desc",
+]
+
+# Sentencias fijas, construidas una sola vez al importar: SQLAlchemy reutiliza
+# su forma compilada en cada ejecución
+_INSERT_TMP = text(
+    "INSERT INTO tmp_barcode_map VALUES "
+    "(:product_id, :barcode, :category, :brand, :discount_percent, :promo_desc)"
+)
+_UPDATE_FROM_TMP = text("""
+UPDATE product_stocks AS p
+SET barcode = v.barcode,
+    category = v.category,
+    brand = v.brand,
+    is_on_sale = CASE WHEN v.discount_percent IS NOT NULL
+        THEN true ELSE p.is_on_sale END,
+    discount_percent = COALESCE(v.discount_percent, p.discount_percent),
+    discount_amount = CASE WHEN v.discount_percent IS NOT NULL
+        THEN ROUND(p.unit_cost * v.discount_percent / 100, 2)
+        ELSE p.discount_amount END,
+    promotion_description = COALESCE(v.promo_desc, p.promotion_description),
+    promotion_valid_until = CASE WHEN v.discount_percent IS NOT NULL
+        THEN CURRENT_DATE + INTERVAL '30 days'
+        ELSE p.promotion_valid_until END
+FROM tmp_barcode_map AS v
+WHERE p.product_id = v.product_id
+  AND (p.barcode IS NULL OR p.category IS NULL)
+RETURNING p.product_id, v.barcode, v.brand, v.category
+""")
+# Productos del mapeo a los que aún les falta barcode o categoría
+_PENDIENTES = text("""
+SELECT COUNT(*) FROM product_stocks
+WHERE product_id = ANY(:pids) AND (barcode IS NULL OR category IS NULL)
+""")
+_LOCK = text("SELECT pg_advisory_lock(:k)")
+_UNLOCK = text("SELECT pg_advisory_unlock(:k)")
+
+
 # Asignar códigos de barras a productos existentes
 BARCODES_MAPPING = {
     # Nike
@@ -145,19 +193,30 @@ CATEGORIAS_MAPPING = {
 }
 
 
-# Marcas por prefijo
+# Marcas por prefijo (el token antes del primer "-")
+_PREFIX_TO_BRAND = {
+    "NIKE": "Nike",
+    "ADIDAS": "Adidas",
+    "PUMA": "Puma",
+    "NB": "New Balance",
+    "ACC": "Generic",
+}
+# Accesorios de marca: excepción explícita a la regla del prefijo
+_ACC_NIKE = frozenset({"ACC-001"})
+
+
 def get_brand(product_id: str) -> str:
     """Extrae la marca del product_id."""
-    if product_id.startswith("NIKE") or product_id.startswith("ACC-001"):
+    if product_id in _ACC_NIKE:
         return "Nike"
-    elif product_id.startswith("ADIDAS"):
-        return "Adidas"
-    elif product_id.startswith("PUMA"):
-        return "Puma"
-    elif product_id.startswith("NB"):
-        return "New Balance"
-    else:
-        return "Generic"
+    return _PREFIX_TO_BRAND.get(product_id.split("-", 1)[0], "Generic")
+
+
+# Marca precalculada por producto (se resuelve una vez al importar)
+BRAND_BY_PRODUCT = {product_id: get_brand(product_id) for product_id in BARCODES_MAPPING}
+
+# product_ids del mapeo, enlazados como array en la consulta de pendientes
+_MAPPED_IDS = list(BARCODES_MAPPING)
 
 
 # Productos con descuentos de lanzamiento
@@ -179,125 +238,110 @@ PROMOCIONES_LANZAMIENTO = [
     },
 ]
 
+# Índice product_id -> (descuento, descripción), con el Decimal ya construido
+PROMO_INDEX = {
+    p["product_id"]: (Decimal(str(p["descuento"])), p["descripcion"])
+    for p in PROMOCIONES_LANZAMIENTO
+}
+_SIN_PROMO = (None, None)
 
-async def run_migration():
-    """Ejecuta la migración de la base de datos."""
-    print("=" * 70)
-    print(" MIGRACIÓN DE BASE DE DATOS")
-    print(" Agregando: barcode, descuentos, categorías, marcas")
-    print("=" * 70)
-    
-    engine = get_engine()
-    session_factory = get_session_factory()
-    
-    # 1. Crear nuevas columnas
-    print("\n1. Creando nuevas columnas...")
+
+async def _run_sql_block(engine, sql: str) -> None:
+    """Ejecuta un bloque de SQL sentencia por sentencia en una transacción."""
     async with engine.begin() as conn:
-        # Ejecutar el SQL de migración por partes
-        statements = [s.strip() for s in MIGRATION_SQL.split(';') if s.strip()]
+        statements = [s.strip() for s in sql.split(';') if s.strip()]
         for stmt in statements:
-            try:
-                await conn.execute(text(stmt))
-                print(f"   ✓ {stmt[:50]}...")
-            except Exception as e:
-                print(f"   ⚠️  {stmt[:50]}... (puede que ya exista)")
-    print("   ✓ Columnas creadas")
+            # IF NOT EXISTS ya da la idempotencia; cualquier otro error se propaga
+            await conn.execute(text(stmt))
+            print(f"   ✓ {stmt[:50]}...")
+
+
+async def _asignar_datos(session_factory) -> None:
+    """Asigna barcode, categoría, marca y promoción a los productos pendientes."""
+    filas = []
+    for product_id, barcode in BARCODES_MAPPING.items():
+        category = CATEGORIAS_MAPPING.get(product_id)
+        if not (barcode and category):
+            continue
+        
+        # Verificar si tiene promoción
+        disc_pct, disc_desc = PROMO_INDEX.get(product_id, _SIN_PROMO)
+        filas.append((
+            product_id,
+            barcode,
+            category,
+            BRAND_BY_PRODUCT[product_id],
+            disc_pct,
+            disc_desc,
+        ))
     
-    # 2. Asignar barcodes, categorías y marcas
-    print("\n2. Asignando códigos de barras, categorías y marcas...")
     async with session_factory() as session:
-        # Obtener todos los productos
-        result = await session.execute(text("SELECT id, product_id, unit_cost FROM product_stocks"))
-        productos = result.fetchall()
+        # Camino rápido para re-ejecuciones: nada pendiente, nada que escribir
+        pendientes = await session.scalar(_PENDIENTES, {"pids": _MAPPED_IDS})
+        if not pendientes:
+            print("   ✓ Migración ya aplicada: no hay productos pendientes")
+            return
         
-        productos_actualizados = 0
+        await session.execute(TMP_BARCODE_MAP_SQL)
         
-        for prod in productos:
-            product_db_id = prod.id
-            product_id = prod.product_id
-            unit_cost = prod.unit_cost
-            
-            # Obtener valores
-            barcode = BARCODES_MAPPING.get(product_id)
-            category = CATEGORIAS_MAPPING.get(product_id)
-            brand = get_brand(product_id)
-            
-            # Verificar si tiene promoción
-            promo = next((p for p in PROMOCIONES_LANZAMIENTO if p["product_id"] == product_id), None)
-            
-            if barcode and category:
-                if promo:
-                    # Calcular precios con descuento
-                    discount_percent = Decimal(str(promo["descuento"]))
-                    discount_amount = (unit_cost * discount_percent / 100).quantize(Decimal("0.01"))
-                    
-                    await session.execute(
-                        text("""
-                            UPDATE product_stocks 
-                            SET barcode = :barcode,
-                                category = :category,
-                                brand = :brand,
-                                is_on_sale = true,
-                                discount_percent = :discount_percent,
-                                discount_amount = :discount_amount,
-                                promotion_description = :promo_desc,
-                                promotion_valid_until = CURRENT_DATE + INTERVAL '30 days'
-                            WHERE id = :id
-                        """),
-                        {
-                            "barcode": barcode,
-                            "category": category,
-                            "brand": brand,
-                            "discount_percent": discount_percent,
-                            "discount_amount": discount_amount,
-                            "promo_desc": promo["descripcion"],
-                            "id": product_db_id
-                        }
-                    )
-                else:
-                    # Sin promoción
-                    await session.execute(
-                        text("""
-                            UPDATE product_stocks 
-                            SET barcode = :barcode,
-                                category = :category,
-                                brand = :brand
-                            WHERE id = :id
-                        """),
-                        {
-                            "barcode": barcode,
-                            "category": category,
-                            "brand": brand,
-                            "id": product_db_id
-                        }
-                    )
-                
-                productos_actualizados += 1
-                print(f"   ✓ {product_id}: {barcode} ({brand} - {category})")
+        # Carga de la tabla temporal: COPY si el driver es asyncpg, si no executemany
+        conn = await session.connection()
+        raw = await conn.get_raw_connection()
+        driver = raw.driver_connection
+        if hasattr(driver, "copy_records_to_table"):
+            await driver.copy_records_to_table(
+                "tmp_barcode_map", records=filas, columns=TMP_BARCODE_MAP_COLUMNS
+            )
+        else:
+            await session.execute(
+                _INSERT_TMP,
+                [dict(zip(TMP_BARCODE_MAP_COLUMNS, fila)) for fila in filas],
+            )
         
+        # El descuento se calcula en Postgres a partir de unit_cost. Las filas
+        # de RETURNING se leen por bloques con un cursor del servidor.
+        result = await session.stream(_UPDATE_FROM_TMP)
+        detalle = []
+        async for partition in result.partitions(STREAM_CHUNK):
+            detalle.extend(
+                f"   ✓ {row.product_id}: {row.barcode} ({row.brand} - {row.category})"
+                for row in partition
+            )
         await session.commit()
-        print(f"\n   Total productos actualizados: {productos_actualizados}")
+        
+        # Un único resumen en lugar de un print por producto
+        print("\n".join(detalle) + f"\n\n   Total productos actualizados: {len(detalle)}")
+
+
+async def _migrate(engine, session_factory) -> None:
+    """Pasos de la migración; se ejecuta con el advisory lock tomado."""
+    # 1. Crear nuevas columnas
+    print("\n1. Creando nuevas columnas...")
+    await _run_sql_block(engine, MIGRATION_SQL_COLUMNS)
+    print("   ✓ Columnas creadas")
+    
+    # 2. Asignar barcodes, categorías y marcas (COPY a tabla temporal + un UPDATE)
+    print("\n2. Asignando códigos de barras, categorías y marcas...")
+    await _asignar_datos(session_factory)
+    
+    # 3. Índices, una vez pobladas las columnas
+    print("\n3. Creando índices...")
+    await _run_sql_block(engine, MIGRATION_SQL_INDEXES)
+    print("   ✓ Índices creados")
     
-    # 3. Verificación
-    print("\n3. Verificando migración...")
+    # 4. Verificación
+    print("\n4. Verificando migración...")
     async with session_factory() as session:
-        # Contar productos con barcode
-        result = await session.execute(
-            text("SELECT COUNT(*) FROM product_stocks WHERE barcode IS NOT NULL")
-        )
-        con_barcode = result.scalar()
-        
-        # Contar productos con categoría
+        # Contar productos con barcode, con categoría y en oferta (un solo recorrido)
         result = await session.execute(
-            text("SELECT COUNT(*) FROM product_stocks WHERE category IS NOT NULL")
-        )
-        con_categoria = result.scalar()
-        
-        # Contar productos en oferta
-        result = await session.execute(
-            text("SELECT COUNT(*) FROM product_stocks WHERE is_on_sale = true")
+            text("""
+                SELECT COUNT(barcode) AS con_barcode,
+                       COUNT(category) AS con_categoria,
+                       COUNT(*) FILTER (WHERE is_on_sale) AS con_oferta
+                FROM product_stocks
+            """)
         )
-        con_oferta = result.scalar()
+        con_barcode, con_categoria, con_oferta = result.one()
         
         # Mostrar algunos ejemplos
         result = await session.execute(
@@ -320,8 +364,30 @@ async def run_migration():
             oferta_str = f" (🎉 {ej.discount_percent}% OFF)" if ej.is_on_sale else ""
             print(f"      - {ej.product_name}")
             print(f"        Barcode: {ej.barcode} | {ej.brand} | {ej.category}{oferta_str}")
+
+
+async def run(engine):
+    """Ejecuta la migración de la base de datos usando `engine`."""
+    print("=" * 70)
+    print(" MIGRACIÓN DE BASE DE DATOS")
+    print(" Agregando: barcode, descuentos, categorías, marcas")
+    print("=" * 70)
+    
+    session_factory = get_session_factory(engine)
     
-    await engine.dispose()
+    # Serializar migradores concurrentes con un advisory lock de sesión,
+    # en una conexión propia en autocommit que se mantiene toda la migración.
+    # Si otro proceso está migrando se espera a que termine: la migración es
+    # idempotente, así que el segundo solo completa lo que falte.
+    async with engine.connect() as lock_conn:
+        lock_conn = await lock_conn.execution_options(isolation_level="AUTOCOMMIT")
+        await lock_conn.execute(_LOCK, {"k": MIGRATION_LOCK_KEY})
+        try:
+            await _migrate(engine, session_factory)
+        finally:
+            await lock_conn.execute(
+                _UNLOCK, {"k": MIGRATION_LOCK_KEY}
+            )
     
     print("\n" + "=" * 70)
     print(" ✅ MIGRACIÓN COMPLETADA EXITOSAMENTE")
@@ -338,5 +404,15 @@ async def run_migration():
         print(f"   • {promo['product_id']}: {promo['descripcion']}")
 
 
+async def run_migration():
+    """Punto de entrada standalone: crea el engine, migra y lo libera."""
+    # Dos conexiones fijas: la del advisory lock y la de trabajo
+    engine = create_migration_engine(str(get_business_settings().pg_url), pool_size=2)
+    try:
+        await run(engine)
+    finally:
+        await engine.dispose()
+
+
 if __name__ == "__main__":
     asyncio.run(run_migration())
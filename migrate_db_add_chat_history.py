@@ -4,88 +4,72 @@ Script de migración para crear la tabla chat_history.
 Ejecutar con: python migrate_db_add_chat_history.py
 """
 import asyncio
+import os
+
 from sqlalchemy import text
-from sqlalchemy.ext.asyncio import create_async_engine
 
 from backend.config import get_business_settings
+from backend.database.connection import create_migration_engine
 from backend.database.models.base import Base
 from backend.database.models.chat_history import ChatHistory
 
 
+# Índices adicionales para optimización de queries. `IF NOT EXISTS` ya los
+# hace idempotentes.
+CHAT_HISTORY_INDEXES = tuple(
+    text(f"CREATE INDEX IF NOT EXISTS idx_chat_history_{name} ON public.chat_history({columns})")
+    for name, columns in (
+        ("session_id", "session_id"),
+        ("user_id", "user_id"),
+        ("order_id", "order_id"),
+        ("created_at", "created_at DESC"),
+        ("role", "role"),
+    )
+)
+
+
+async def _create_index(engine, stmt) -> None:
+    """Crea un índice en su propia conexión y transacción."""
+    async with engine.begin() as conn:
+        await conn.execute(stmt)
+
+
+async def run(engine):
+    """Crea la tabla chat_history y sus índices usando `engine`."""
+    async with engine.begin() as conn:
+        # Crear la tabla chat_history (usar create_all en lugar de create_tables)
+        await conn.run_sync(Base.metadata.create_all)
+    print("✅ Tabla chat_history creada exitosamente")
+    
+    # CREATE INDEX toma un ShareLock, compatible entre sí: cada índice va en
+    # una conexión distinta y Postgres los construye en paralelo
+    await asyncio.gather(*(_create_index(engine, stmt) for stmt in CHAT_HISTORY_INDEXES))
+    print("✅ Índices de chat_history creados")
+
+
 async def migrate():
     """Crea la tabla chat_history en la base de datos."""
     
-    # Crear engine
+    # Crear engine (el log de SQL solo con DEBUG definido), con una conexión
+    # por índice. El DDL es de un solo uso: sin caché de sentencias
+    # preparadas y sin JIT de Postgres
     settings = get_business_settings()
-    engine = create_async_engine(
+    engine = create_migration_engine(
         str(settings.pg_url),
-        echo=True,
+        pool_size=len(CHAT_HISTORY_INDEXES),
+        echo="debug" if os.getenv("DEBUG") else False,
+        connect_args={
+            "statement_cache_size": 0,
+            "server_settings": {
+                "jit": "off",
+                "application_name": "migrate_chat_history",
+            },
+        },
     )
-    
-    async with engine.begin() as conn:
-        # Crear la tabla chat_history (usar create_all en lugar de create_tables)
-        await conn.run_sync(Base.metadata.create_all)
-        
-        # Crear índices adicionales para optimización de queries
-        try:
-            await conn.execute(text(
-                """
-                CREATE INDEX IF NOT EXISTS idx_chat_history_session_id 
-                ON public.chat_history(session_id);
-                """
-            ))
-            print("✅ Índice en session_id creado")
-        except Exception as e:
-            print(f"⚠️  Índice session_id ya existe: {e}")
-        
-        try:
-            await conn.execute(text(
-                """
-                CREATE INDEX IF NOT EXISTS idx_chat_history_user_id 
-                ON public.chat_history(user_id);
-                """
-            ))
-            print("✅ Índice en user_id creado")
-        except Exception as e:
-            print(f"⚠️  Índice user_id ya existe: {e}")
-        
-        try:
-            await conn.execute(text(
-                """
-                CREATE INDEX IF NOT EXISTS idx_chat_history_order_id 
-                ON public.chat_history(order_id);
-                """
-            ))
-            print("✅ Índice en order_id creado")
-        except Exception as e:
-            print(f"⚠️  Índice order_id ya existe: {e}")
-        
-        try:
-            await conn.execute(text(
-                """
-                CREATE INDEX IF NOT EXISTS idx_chat_history_created_at 
-                ON public.chat_history(created_at DESC);
-                """
-            ))
-            print("✅ Índice en created_at creado")
-        except Exception as e:
-            print(f"⚠️  Índice created_at ya existe: {e}")
-        
-        try:
-            await conn.execute(text(
-                """
-                CREATE INDEX IF NOT EXISTS idx_chat_history_role 
-                ON public.chat_history(role);
-                """
-            ))
-            print("✅ Índice en role creado")
-        except Exception as e:
-            print(f"⚠️  Índice role ya existe: {e}")
-        
-        await conn.commit()
-        print("✅ Tabla chat_history creada exitosamente")
-    
-    await engine.dispose()
+    try:
+        await run(engine)
+    finally:
+        await engine.dispose()
 
 
 if __name__ == "__main__":
@@ -13,41 +13,90 @@ Uso:
   python setup_db_all.py --all
   python setup_db_all.py --steps init_db,migrate_barcodes,chat_history
 
-Este script ejecuta los otros scripts como procesos separados usando el mismo
-intérprete de Python (`sys.executable`).
+Los scripts se importan en este mismo proceso y cada uno expone
+`async def run(engine)`: todos comparten un único engine, sin arrancar un
+intérprete ni crear un engine por script. Los pasos sin dependencia entre sí
+(p. ej. barcodes y chat_history) se ejecutan en paralelo; `init_db` actúa
+como barrera para todos los demás.
 """
 from __future__ import annotations
 
 import argparse
-import subprocess
-import sys
+import asyncio
+import importlib.util
 from pathlib import Path
+from types import ModuleType
 
 
+# (nombre, script, recomendado, depende_de). El orden es topológico.
 SCRIPTS = [
-    ("init_db", "init.db.py", True),
-    ("migrate_barcodes", "migrate_db_add_barcode_discounts.py", True),
-    ("chat_history", "migrate_db_add_chat_history.py", True),
-    ("init_catalog", "init_db_2.py", False),
-    ("init_test_db", "init_test_db.py", False),
+    ("init_db", "init.db.py", True, ()),
+    ("migrate_barcodes", "migrate_db_add_barcode_discounts.py", True, ("init_db",)),
+    ("chat_history", "migrate_db_add_chat_history.py", True, ("init_db",)),
+    ("init_catalog", "init_db_2.py", False, ("init_db", "migrate_barcodes")),
+    ("init_test_db", "init_test_db.py", False, ("init_db",)),
 ]
 
 
-def run_script(path: str) -> None:
+def load_script(name: str, path: str) -> ModuleType | None:
+    """Importa un script por ruta (algunos, como `init.db.py`, no son módulos válidos)."""
     p = Path(path)
     if not p.exists():
         print(f"⚠️  Script no encontrado: {path} — se omite")
+        return None
+
+    spec = importlib.util.spec_from_file_location(f"_setup_{name}", p)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+async def run_script(module: ModuleType | None, path: str, engine) -> None:
+    if module is None:
         return
 
     print(f"▶ Ejecutando: {path}")
     try:
-        subprocess.run([sys.executable, str(p)], check=True)
+        await module.run(engine)
         print(f"✔ {path} completado\n")
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Error ejecutando {path}: exit={e.returncode}")
+    except Exception as e:
+        print(f"❌ Error ejecutando {path}: {e}")
         raise
 
 
+async def _run_after(deps: list[asyncio.Task], module: ModuleType | None, path: str, engine) -> None:
+    """Espera a que terminen las dependencias (propagando su error) y ejecuta el script."""
+    for dep in deps:
+        await dep
+    await run_script(module, path, engine)
+
+
+async def run_all(to_run: list[tuple]) -> None:
+    """
+    Ejecuta los pasos respetando sus dependencias y paraleliza el resto.
+    
+    Las dependencias que no forman parte de `to_run` se consideran satisfechas.
+    """
+    modules = {name: load_script(name, script) for name, script, _, _ in to_run}
+
+    # Importado tras cargar los scripts: ellos ya inicializaron el entorno (.env)
+    from backend.config import get_business_settings
+    from backend.database.connection import create_migration_engine
+
+    # Pool fijo y pequeño: migrate_barcodes (lock + trabajo) y chat_history
+    # son los únicos pasos que llegan a coincidir; los índices de chat_history
+    # esperan turno en el pool
+    engine = create_migration_engine(str(get_business_settings().pg_url), pool_size=3)
+    tasks: dict[str, asyncio.Task] = {}
+    try:
+        async with asyncio.TaskGroup() as tg:
+            for name, script, _, depends_on in to_run:
+                deps = [tasks[d] for d in depends_on if d in tasks]
+                tasks[name] = tg.create_task(_run_after(deps, modules[name], script, engine))
+    finally:
+        await engine.dispose()
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Runner unificado de migraciones e init DB")
     parser.add_argument(
@@ -83,8 +132,7 @@ def main() -> None:
             to_run = []
 
     print("=== INICIANDO SETUP DE BASE DE DATOS ===")
-    for name, script, _ in to_run:
-        run_script(script)
+    asyncio.run(run_all(to_run))
 
     print("=== SETUP COMPLETADO ===")
 